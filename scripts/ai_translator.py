@@ -5,14 +5,99 @@ AI 翻译模块 - 重构版
 """
 
 import re
+import string
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import atexit
+import hashlib
+import sqlite3
+import threading
 import concurrent.futures
-from typing import Dict, List, Optional, Any, Callable, Tuple, Set
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Tuple, Set, FrozenSet
 from dataclasses import dataclass
+from functools import lru_cache
 import time
 
+# JSON 序列化：优先使用 orjson（更快），未安装时回退到标准库 json
+try:
+    import orjson
 
-@dataclass
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    _json_loads = json.loads
+
+
+# 预编译的正则表达式（模块级，避免每次调用时查询 re 内部缓存）
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_LATIN_RE = re.compile(r"[a-zA-Z]")
+_VAR_RE = re.compile(r"__[A-Za-z0-9_]+__")
+_VAR_ONLY_RE = re.compile(r"^(?:__[A-Za-z0-9_-]+__)+$")
+_BRACKET_RE = re.compile(r"^\[[a-zA-Z]+=[^\]]+\]")
+_BATCH_LINE_RE = re.compile(r"^\s*(\d+)\.?\s*(?:中文翻译：|翻译：|:)?\s*(.+)$")
+
+# is_english_text 使用的字符表：拉丁字母、数字和常见英文标点
+_ENGLISH_CHARS = string.ascii_letters + string.digits + " .,!?:;-_'\"()[]{}<>/\\|=+&%$#@"
+_ENGLISH_DELETE_TABLE = str.maketrans("", "", _ENGLISH_CHARS)
+_CONTROL_DELETE_TABLE = str.maketrans("", "", "\n\t\r")
+
+# 默认的游戏背景描述
+GAME_CONTEXT = "《异星工厂》是一款科幻/工业自动化游戏，主题包括科技、工厂、自动化、神秘、哲学等。"
+
+# 批量翻译提示词中不随批次变化的部分
+_PROMPT_HEADER_TEMPLATE = """请将以下游戏文本从英文翻译成简体中文。要求：
+
+重要规则：
+1. 保持准确的技术含义和游戏术语
+2. 保持格式标记不变（如[color=red]、[item=...]、[fluid=...]、[entity=...]、[font=...]、[img=...]等）
+3. 类似"__xxx__"这样的游戏变量（如__ENTITY__、__ITEM__、__FLUID__、__1__、__2__、__REMARK_COLOR_BEGIN__、__REMARK_COLOR_END__等）不应该被翻译，必须原样保留
+4. 在准确的基础上，尽量让翻译有趣、生动、有游戏感
+5. 可以适当加入幽默感，但不要过度，以免失去原文的专业和神秘氛围
+6. 保持文本的流畅性和可读性
+7. 如果文本中包含名词表中的术语，请优先使用名词表中的翻译
+
+游戏背景：{game_context}
+
+"""
+
+_PROMPT_FORMAT = """
+请按以下格式回复，严格保持编号对应：
+1. 中文翻译：[翻译结果1]
+2. 中文翻译：[翻译结果2]
+...
+
+需要翻译的文本：
+"""
+
+# JSON 模式下的回复格式说明（提示词中需要出现 "JSON"，部分 API 以此校验 json_object 模式）
+_PROMPT_FORMAT_JSON = """
+请以 JSON 对象回复，键为编号字符串，值为对应的中文翻译，严格保持编号对应，例如：
+{"1": "翻译结果1", "2": "翻译结果2"}
+
+需要翻译的文本：
+"""
+
+_PROMPT_FOOTER = """
+
+请开始翻译："""
+
+
+@lru_cache(maxsize=8)
+def _prompt_header(game_context: str) -> str:
+    """渲染提示词的固定开头部分（按游戏背景缓存）"""
+    return _PROMPT_HEADER_TEMPLATE.format(game_context=game_context)
+
+
+@dataclass(slots=True, frozen=True)
 class TranslationItem:
     """翻译项数据结构"""
 
@@ -25,6 +110,104 @@ class TranslationItem:
     needs_translation: bool = True
 
 
+class LRUCache:
+    """
+    线程安全的 LRU 缓存
+    容量已满时淘汰最久未使用的条目，读写均在锁内完成
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        """
+        初始化 LRU 缓存
+
+        Args:
+            maxsize: 最大条目数
+        """
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取缓存值，命中时将其标记为最近使用"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存值，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def update(self, entries: Dict[str, Any]) -> None:
+        """批量写入缓存值，整批只获取一次锁"""
+        with self._lock:
+            for key, value in entries.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCache:
+    """
+    基于 SQLite 的持久化缓存，跨运行保留结果
+    键经过命名空间（模型、温度等）哈希，值以 JSON 形式保存
+    """
+
+    def __init__(self, path: str, namespace: str = ""):
+        """
+        初始化持久化缓存
+
+        Args:
+            path: SQLite 数据库文件路径
+            namespace: 命名空间，参与键的哈希，配置不同时互不命中
+        """
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v TEXT)")
+        self._db.commit()
+
+    def _hash_key(self, key: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{key}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取缓存值"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT v FROM cache WHERE k = ?", (self._hash_key(key),)
+            ).fetchone()
+        return _json_loads(row[0]) if row else default
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """批量写入缓存值（单个事务）"""
+        if not items:
+            return
+        rows = [
+            (self._hash_key(key), _json_dumps(value).decode("utf-8"))
+            for key, value in items.items()
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO cache (k, v) VALUES (?, ?)", rows
+            )
+
+
 class AIClient:
     """
     AI 客户端，负责向 API 批量发送和接收请求
@@ -41,6 +224,13 @@ class AIClient:
         max_workers: int = 5,
         max_retries: int = 3,
         retry_delay: int = 2,
+        cache_size: int = 100_000,
+        max_consecutive_failures: int = 3,
+        token_budget: int = 3000,
+        cache_path: Optional[str] = None,
+        stall_timeout: float = 30,
+        response_format: Optional[Dict[str, Any]] = None,
+        cache_namespace: str = "",
     ):
         """
         初始化 AI 客户端
@@ -53,7 +243,14 @@ class AIClient:
             batch_size: 批量大小
             max_workers: 最大工作线程数
             max_retries: 最大重试次数
-            retry_delay: 重试延迟（秒）
+            retry_delay: 首次重试延迟（秒），之后每次翻倍
+            cache_size: 结果缓存的最大条目数
+            max_consecutive_failures: 连续失败多少个批次后取消剩余批次
+            token_budget: 按 token 分批时每个批次的估算 token 上限
+            cache_path: 持久化缓存文件路径（可选），提供时结果会跨运行保留
+            stall_timeout: 流式响应开始输出后，两帧数据之间允许的最长间隔（秒），超过则放弃本次请求并重试
+            response_format: 请求体中的 response_format（可选），如 {"type": "json_object"}
+            cache_namespace: 持久化缓存的附加命名空间（可选），如提示词和名词表的指纹
         """
         self.api_key = api_key
         self.api_url = api_url
@@ -63,12 +260,66 @@ class AIClient:
         self.max_workers = max_workers
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_consecutive_failures = max_consecutive_failures
+        self.token_budget = token_budget
+        self.stall_timeout = stall_timeout
+        self.response_format = response_format
+
+        # 缓存（有界且线程安全，工作线程会并发读写）
+        self.cache = LRUCache(maxsize=cache_size)
+        # 持久化缓存，按模型、温度和调用方提供的命名空间区分
+        self.disk_cache: Optional[SQLiteCache] = None
+        if cache_path:
+            namespace = (
+                f"{model_name}:{request_options.get('temperature')}:{cache_namespace}"
+            )
+            self.disk_cache = SQLiteCache(cache_path, namespace=namespace)
 
-        # 缓存
-        self.cache: Dict[str, Any] = {}
+        # 线程池在客户端生命周期内复用，避免每次 process_batches 都创建和回收工作线程
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ai-trans"
+        )
+        atexit.register(self._executor.shutdown, wait=False)
 
-        # 会话
+        # 会话：连接池大小与并发线程数一致，保证每个工作线程都能复用 keep-alive 连接
+        # 连接错误和限流/服务端错误由 urllib3 按指数退避重试，并遵守 429 的 Retry-After
         self.session = requests.Session()
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=retry_delay,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 请求头在会话上设置一次，不再每次请求重新构建
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+
+    def get_cached(self, cache_key: str) -> Any:
+        """
+        查询缓存：先查内存，未命中再查持久化缓存并放入内存
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            缓存的结果，未命中时返回None
+        """
+        cached = self.cache.get(cache_key)
+        if cached is None and self.disk_cache is not None:
+            cached = self.disk_cache.get(cache_key)
+            if cached is not None:
+                self.cache.set(cache_key, cached)
+        return cached
 
     def process_batch(
         self,
@@ -96,15 +347,19 @@ class AIClient:
         cached_results = {}
         remaining_items = []
         remaining_indices = []
+        # 未命中项的缓存键，写回缓存时复用，避免重复生成
+        remaining_keys: List[str] = []
 
         if cache_key_callback:
             for i, item in enumerate(batch_items):
                 cache_key = cache_key_callback(item)
-                if cache_key in self.cache:
-                    cached_results[i] = self.cache[cache_key]
+                cached = self.get_cached(cache_key)
+                if cached is not None:
+                    cached_results[i] = cached
                 else:
                     remaining_items.append(item)
                     remaining_indices.append(i)
+                    remaining_keys.append(cache_key)
         else:
             remaining_items = batch_items
             remaining_indices = list(range(len(batch_items)))
@@ -122,8 +377,7 @@ class AIClient:
         if not response_text:
             # 请求失败，返回缓存的结果，对于未缓存的项返回None
             all_results = cached_results.copy()
-            for idx in remaining_indices:
-                all_results[idx] = None
+            all_results.update(dict.fromkeys(remaining_indices))
             return all_results
 
         # 解析结果
@@ -131,17 +385,21 @@ class AIClient:
 
         # 合并结果并更新缓存
         all_results = cached_results.copy()
+        new_entries: Dict[str, Any] = {}
         for idx_in_remaining, result in batch_results.items():
             if idx_in_remaining < len(remaining_indices):
                 original_idx = remaining_indices[idx_in_remaining]
-                item = remaining_items[idx_in_remaining]
 
                 if result is not None:
                     all_results[original_idx] = result
-                    # 更新缓存
                     if cache_key_callback:
-                        cache_key = cache_key_callback(item)
-                        self.cache[cache_key] = result
+                        new_entries[remaining_keys[idx_in_remaining]] = result
+
+        # 每个批次的新结果一次性写入缓存：内存缓存只加一次锁，持久化缓存只用一个事务
+        if new_entries:
+            self.cache.update(new_entries)
+            if self.disk_cache is not None:
+                self.disk_cache.set_many(new_entries)
 
         return all_results
 
@@ -155,55 +413,141 @@ class AIClient:
         Returns:
             API响应文本，失败时返回None
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         payload = {
             "model": self.model_name,
             "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
+            # 流式返回：边接收边拼接，避免等待完整响应体后再整体解析
+            "stream": True,
             **self.request_options,
         }
-
+        if self.response_format:
+            payload["response_format"] = self.response_format
+        # 请求体只序列化一次，重试时直接复用
+        body = _json_dumps(payload)
+
+        # 建立连接、等待响应超时（POST 在 allowed_methods 中，读超时计入 total）
+        # 和 HTTP 状态层面的重试由会话上的 urllib3 Retry 完成，
+        # 这里只重试读取流式响应时的中断（停滞、连接断开、数据损坏）
         for attempt in range(self.max_retries):
             try:
-                response = self.session.post(
+                with self.session.post(
                     self.api_url,
-                    headers=headers,
-                    json=payload,
+                    data=body,
                     timeout=self.request_options.get("timeout", 120),
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    # DeepSeek API返回格式: choices[0].message.content
-                    if "choices" in result and len(result["choices"]) > 0:
-                        return (
-                            result["choices"][0]
-                            .get("message", {})
-                            .get("content", "")
-                            .strip()
-                        )
-                    else:
-                        # 备用方案
-                        return result.get("response", "").strip()
-                else:
-                    print(
-                        f"警告：API请求失败 ({response.status_code})，第{attempt + 1}次重试"
-                    )
-
-            except Exception as e:
-                print(f"警告：请求异常 ({e})，第{attempt + 1}次重试")
-
-            # 如果不是最后一次尝试，等待后重试
+                    stream=True,
+                ) as response:
+                    if response.status_code != 200:
+                        print(f"错误：API请求失败 ({response.status_code})")
+                        return None
+                    try:
+                        return self._read_response_text(response)
+                    except Exception as e:
+                        print(f"警告：读取响应中断 ({e})，第{attempt + 1}次重试")
+            except requests.RequestException as e:
+                print(f"错误：请求失败 ({e})")
+                return None
+
+            # 如果不是最后一次尝试，按指数退避等待后重试
             if attempt < self.max_retries - 1:
-                time.sleep(self.retry_delay)
+                time.sleep(self.retry_delay * 2**attempt)
 
         print(f"错误：请求失败，已达到最大重试次数 {self.max_retries}")
         return None
 
+    def _read_response_text(self, response: requests.Response) -> str:
+        """
+        读取 API 响应中的回复文本
+
+        支持 SSE 流式响应（data: {...} 帧），服务端不支持流式时按普通 JSON 响应解析
+
+        Args:
+            response: 以 stream=True 发出的请求的响应
+
+        Returns:
+            回复文本
+        """
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            result = _json_loads(response.content)
+            # DeepSeek API返回格式: choices[0].message.content
+            if "choices" in result and len(result["choices"]) > 0:
+                return (
+                    result["choices"][0].get("message", {}).get("content", "").strip()
+                )
+            else:
+                # 备用方案
+                return result.get("response", "").strip()
+
+        # 流式返回格式: 每帧 choices[0].delta.content，以 [DONE] 结束
+        # 首帧前最多等待请求的 timeout，收到首帧后两帧数据间隔最多 stall_timeout，超过就放弃，交给重试逻辑：
+        # - 连接完全沉默：由底层读超时处理，收到首帧后把读超时从 timeout 缩短为 stall_timeout
+        # - 只有心跳行：心跳会让底层读取一直成功，所以另按数据帧计时，在收到非数据行时检查期限
+        # 已经到达的数据帧总是会被接受
+        parts: List[str] = []
+        limit = self.request_options.get("timeout", 120)
+        deadline = time.monotonic() + limit
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"流式响应超过 {limit} 秒没有新的数据")
+                continue
+            if limit != self.stall_timeout:
+                # 首帧已到达，之后按 stall_timeout 计时
+                limit = self.stall_timeout
+                _set_read_timeout(response, limit)
+            deadline = time.monotonic() + limit
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            chunk = _json_loads(data)
+            choices = chunk.get("choices")
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    parts.append(content)
+        return "".join(parts).strip()
+
+    def _split_batches(
+        self,
+        all_items: List[Any],
+        weight_callback: Optional[Callable[[Any], int]] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        将项目切分为批次
+
+        每个批次最多 batch_size 个项目；提供 weight_callback 时，
+        还会按估算 token 数贪心装箱，累计超过 token_budget 就开始新批次。
+        只返回边界，批次列表在提交时才切片，避免一次性复制整个 all_items
+
+        Args:
+            all_items: 所有项目列表
+            weight_callback: 项目的估算 token 数回调函数（可选）
+
+        Returns:
+            (批次在 all_items 中的起始索引, 结束索引) 的列表
+        """
+        total = len(all_items)
+        if weight_callback is None:
+            return [
+                (i, min(i + self.batch_size, total))
+                for i in range(0, total, self.batch_size)
+            ]
+
+        bounds: List[Tuple[int, int]] = []
+        start_idx = 0
+        current_tokens = 0
+        for i, item in enumerate(all_items):
+            tokens = weight_callback(item)
+            if i > start_idx and (
+                i - start_idx >= self.batch_size
+                or current_tokens + tokens > self.token_budget
+            ):
+                bounds.append((start_idx, i))
+                start_idx, current_tokens = i, 0
+            current_tokens += tokens
+        if start_idx < total:
+            bounds.append((start_idx, total))
+        return bounds
+
     def process_batches(
         self,
         all_items: List[Any],
@@ -211,6 +555,7 @@ class AIClient:
         result_callback: Callable[[str, List[Any]], Dict[int, Any]],
         cache_key_callback: Optional[Callable[[Any], str]] = None,
         progress_callback: Optional[Callable[[int, int], None]] = None,
+        weight_callback: Optional[Callable[[Any], int]] = None,
     ) -> List[Any]:
         """
         处理所有批次
@@ -221,6 +566,7 @@ class AIClient:
             result_callback: 结果解析回调函数
             cache_key_callback: 缓存键生成回调函数（可选）
             progress_callback: 进度回调函数（可选），接收当前批次和总批次
+            weight_callback: 项目的估算 token 数回调函数（可选），提供时按 token 预算分批
 
         Returns:
             所有项目的结果列表，顺序与输入相同
@@ -229,66 +575,92 @@ class AIClient:
             return []
 
         # 按批次分组
-        batches = []
-        for i in range(0, len(all_items), self.batch_size):
-            batch = all_items[i : i + self.batch_size]
-            batches.append(batch)
+        batches = self._split_batches(all_items, weight_callback)
 
         total_batches = len(batches)
         print(
-            f"总共 {len(all_items)} 个项目，分成 {total_batches} 个批次 (batch_size={self.batch_size})"
+            f"总共 {len(all_items)} 个项目，分成 {total_batches} 个批次 "
+            f"(batch_size={self.batch_size}, token_budget={self.token_budget})"
         )
 
-        # 使用线程池并发处理批次
+        # 使用线程池并发处理批次，结果直接写入预分配的列表，未完成或失败的项保持 None
         all_results: List[Optional[Any]] = [None] * len(all_items)
 
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_workers
-        ) as executor:
-            # 提交所有批次任务
-            future_to_batch = {}
-            for batch_idx, batch in enumerate(batches):
-                start_idx = batch_idx * self.batch_size
-                future = executor.submit(
+        # 滚动窗口提交：同时在途的批次不超过 max_workers * 2，完成一个再补交一个
+        # 避免一次性提交全部批次（请求洪峰、每次唤醒都要扫描全部 future）
+        batch_iter = iter(enumerate(batches))
+        future_to_batch: Dict[concurrent.futures.Future, Tuple[int, int]] = {}
+
+        def submit_next() -> bool:
+            """提交下一个批次，没有剩余批次时返回 False"""
+            for batch_idx, (start_idx, end_idx) in batch_iter:
+                future = self._executor.submit(
                     self.process_batch,
-                    batch,
+                    all_items[start_idx:end_idx],
                     prompt_callback,
                     result_callback,
                     cache_key_callback,
                 )
-                future_to_batch[future] = (batch_idx, start_idx, batch)
+                future_to_batch[future] = (batch_idx, start_idx)
+                return True
+            return False
 
-            # 处理完成的任务
-            for future in concurrent.futures.as_completed(future_to_batch):
-                batch_idx, start_idx, batch = future_to_batch[future]
+        for _ in range(self.max_workers * 2):
+            if not submit_next():
+                break
+
+        # 处理完成的任务
+        consecutive_failures = 0
+        completed = 0
+        # 批次很多时只输出约 20 次进度，避免频繁写终端
+        report_every = max(1, total_batches // 20)
+        while future_to_batch:
+            done, _ = concurrent.futures.wait(
+                future_to_batch, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                batch_idx, start_idx = future_to_batch.pop(future)
                 try:
                     batch_results = future.result()
                     # 将结果放入正确的位置
                     for relative_idx, result in batch_results.items():
-                        absolute_idx = start_idx + relative_idx
-                        if absolute_idx < len(all_results):
-                            all_results[absolute_idx] = result
+                        all_results[start_idx + relative_idx] = result
 
                     # 调用进度回调
                     if progress_callback:
                         progress_callback(batch_idx + 1, total_batches)
 
-                    print(f"批次 {batch_idx + 1}/{total_batches} 完成")
+                    completed += 1
+                    if completed % report_every == 0 or completed == total_batches:
+                        print(f"已完成 {completed}/{total_batches} 个批次")
+
+                    # 整个批次都没有拿到结果，视为一次失败
+                    if any(result is not None for result in batch_results.values()):
+                        consecutive_failures = 0
+                    else:
+                        consecutive_failures += 1
                 except Exception as e:
+                    # 失败批次的项保持预填的 None
                     print(f"批次 {batch_idx + 1} 处理失败: {e}")
-                    # 对于失败的批次，使用None
-                    for i in range(len(batch)):
-                        absolute_idx = start_idx + i
-                        if absolute_idx < len(all_results):
-                            all_results[absolute_idx] = None
+                    consecutive_failures += 1
+
+            # 连续失败过多（如认证失败、限流、服务中断），不再提交新批次并取消尚未开始的批次
+            if consecutive_failures >= self.max_consecutive_failures:
+                cancelled = sum(1 for _ in batch_iter)
+                cancelled += sum(1 for f in future_to_batch if f.cancel())
+                print(
+                    f"错误：连续 {consecutive_failures} 个批次失败，已取消剩余的 {cancelled} 个批次"
+                )
+                # 线程池是共享的，等待已在运行的批次结束后再返回
+                concurrent.futures.wait(future_to_batch)
+                break
 
-        # 确保所有项都有结果
-        final_results: List[Any] = []
-        for i in range(len(all_results)):
-            result = all_results[i]
-            final_results.append(result)
+            # 每完成一个批次补交一个，保持窗口大小
+            for _ in done:
+                if not submit_next():
+                    break
 
-        return final_results
+        return all_results
 
 
 class AITranslator:
@@ -307,6 +679,8 @@ class AITranslator:
         max_workers: int = 5,
         glossary_path: Optional[str] = None,
         whitelist_path: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        json_mode: bool = True,
     ):
         """
         初始化 AI 翻译器
@@ -320,83 +694,48 @@ class AITranslator:
             max_workers: 最大工作线程数
             glossary_path: 名词表文件路径
             whitelist_path: 白名单文件路径
+            cache_path: 持久化翻译缓存文件路径
+            json_mode: 是否要求模型以 JSON 对象返回译文（需 API 支持 response_format）
         """
-        # 创建 AI 客户端
-        self.client = AIClient(
-            api_key=api_key,
-            api_url=api_url,
-            model_name=model_name,
-            request_options=translation_options,
-            batch_size=batch_size,
-            max_workers=max_workers,
-            max_retries=translation_options.get("max_retries", 3),
-            retry_delay=translation_options.get("retry_delay", 2),
-        )
+        self.json_mode = json_mode
 
         # 名词表
         self.glossary: Dict[str, str] = {}
+        # 名词表条目（小写英文术语, 渲染好的提示词行），加载名词表时渲染一次
+        self._glossary_lines: List[Tuple[str, str]] = []
         if glossary_path:
             self.load_glossary(glossary_path)
 
         # 白名单
         self.whitelist: Set[str] = set()
+        self._whitelist_frozen: FrozenSet[str] = frozenset()
         if whitelist_path:
             self.load_whitelist(whitelist_path)
 
+        # 创建 AI 客户端（在加载名词表之后：持久化缓存按提示词模板和名词表的指纹区分，
+        # 修改其中任何一个后旧的译文不会再被命中）
+        self.client = AIClient(
+            api_key=api_key,
+            api_url=api_url,
+            model_name=model_name,
+            request_options=translation_options,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            max_retries=translation_options.get("max_retries", 3),
+            retry_delay=translation_options.get("retry_delay", 2),
+            cache_path=cache_path,
+            stall_timeout=translation_options.get("stall_timeout", 30),
+            response_format={"type": "json_object"} if json_mode else None,
+            cache_namespace=_prompt_fingerprint(self._glossary_lines, json_mode),
+        )
+
     def is_english_text(self, text: str) -> bool:
         """判断文本是否主要是英文"""
-        return _is_english_text_logic(text)
+        return _is_english_text_cached(text)
 
     def needs_translation(self, en_value: str, zh_value: Optional[str]) -> bool:
         """判断是否需要翻译"""
-        # 如果英文值是空字符串，不应该翻译
-        if not en_value or en_value.strip() == "":
-            return False
-
-        # 检查是否在白名单中（完全匹配）
-        if en_value.strip() in self.whitelist:
-            return False
-
-        # 检查是否包含白名单中的词（部分匹配）
-        for word in self.whitelist:
-            if word and word in en_value:
-                # 如果白名单词出现在英文值中，且该词是独立的（前后是单词边界）
-                pattern = r"\b" + re.escape(word) + r"\b"
-                if re.search(pattern, en_value, re.IGNORECASE):
-                    return False
-
-        # 检查英文值是否只包含变量（如__ENTITY__kr-mineral-water__）
-        # 这类值不应该被翻译，应该原样保留
-        if _contains_only_variables(en_value):
-            return False
-
-        # 检查英文值是否以中括号格式开头（如 [img=...]、[entity=...] 等）
-        # 这类值不应该被翻译，应该原样保留
-        if _starts_with_bracket_format(en_value):
-            return False
-
-        # 如果中文值不存在，需要翻译
-        if not zh_value:
-            return True
-
-        # 检查英文值中是否包含变量，并验证中文值是否也包含这些变量
-        en_variables = _extract_variables(en_value)
-        if en_variables:
-            # 如果英文值包含变量，检查中文值是否也包含这些变量
-            if zh_value:
-                for var in en_variables:
-                    if var not in zh_value:
-                        # 中文值缺少英文值中的某个变量，需要重新翻译
-                        return True
-                # 如果中文值包含了所有变量，继续检查是否是英文
-                # 如果中文值是英文，仍然需要翻译
-                pass
-
-        # 如果中文值主要是英文，需要翻译
-        if self.is_english_text(zh_value):
-            return True
-
-        return False
+        return _needs_translation_cached(en_value, zh_value, self._whitelist_frozen)
 
     def load_glossary(self, glossary_path: str) -> None:
         """
@@ -406,7 +745,6 @@ class AITranslator:
             glossary_path: 名词表文件路径
         """
         try:
-            import os
             from pathlib import Path
 
             glossary_file = Path(glossary_path)
@@ -429,6 +767,12 @@ class AITranslator:
                             if english and chinese:
                                 self.glossary[english] = chinese
 
+            # 每个术语的提示词行只渲染一次，构建提示词时按批次内容筛选
+            self._glossary_lines = [
+                (english.lower(), f"- {english}: {chinese}\n")
+                for english, chinese in self.glossary.items()
+            ]
+
             print(f"已加载名词表，包含 {len(self.glossary)} 个术语")
 
         except Exception as e:
@@ -458,131 +802,169 @@ class AITranslator:
                     # 添加白名单词（不区分大小写，但保留原始大小写用于显示）
                     self.whitelist.add(line)
 
+            # 不可变快照，作为 needs_translation 缓存键的一部分
+            self._whitelist_frozen = frozenset(self.whitelist)
+
             print(f"已加载白名单，包含 {len(self.whitelist)} 个专有名词")
 
         except Exception as e:
             print(f"加载白名单失败: {e}")
 
-    def _create_batch_prompt(self, items: List[TranslationItem]) -> str:
+    def _create_batch_prompt(
+        self, items: List[TranslationItem], game_context: str = GAME_CONTEXT
+    ) -> str:
         """
         为批量翻译创建提示词（回调函数）
 
         Args:
             items: 翻译项列表
+            game_context: 游戏背景描述
 
         Returns:
             格式化后的提示词
         """
-        # 构建项目列表
-        items_text = ""
-        for i, item in enumerate(items, 1):
-            items_text += f"{i}. Section: {item.section}, Key: {item.key}\n"
-            items_text += f"   英文: {item.en_value}\n\n"
+        # 构建项目列表（先收集再一次性拼接，避免重复的字符串拷贝）
+        items_text = "".join(
+            f"{i}. Section: {item.section}, Key: {item.key}\n   英文: {item.en_value}\n\n"
+            for i, item in enumerate(items, 1)
+        )
 
-        # 构建名词表参考部分
+        # 名词表参考部分：只包含在本批次英文中出现过的术语
         glossary_text = ""
-        if self.glossary:
-            glossary_text = "\n名词表参考（请优先使用以下术语的翻译）：\n"
-            for english, chinese in self.glossary.items():
-                glossary_text += f"- {english}: {chinese}\n"
-            glossary_text += "\n"
-
-        game_context = "《异星工厂》是一款科幻/工业自动化游戏，主题包括科技、工厂、自动化、神秘、哲学等。"
-
-        prompt = f"""请将以下游戏文本从英文翻译成简体中文。要求：
-
-重要规则：
-1. 保持准确的技术含义和游戏术语
-2. 保持格式标记不变（如[color=red]、[item=...]、[fluid=...]、[entity=...]、[font=...]、[img=...]等）
-3. 类似"__xxx__"这样的游戏变量（如__ENTITY__、__ITEM__、__FLUID__、__1__、__2__、__REMARK_COLOR_BEGIN__、__REMARK_COLOR_END__等）不应该被翻译，必须原样保留
-4. 在准确的基础上，尽量让翻译有趣、生动、有游戏感
-5. 可以适当加入幽默感，但不要过度，以免失去原文的专业和神秘氛围
-6. 保持文本的流畅性和可读性
-7. 如果文本中包含名词表中的术语，请优先使用名词表中的翻译
-
-游戏背景：{game_context}
-
-{glossary_text}
-请按以下格式回复，严格保持编号对应：
-1. 中文翻译：[翻译结果1]
-2. 中文翻译：[翻译结果2]
-...
-
-需要翻译的文本：
-{items_text}
-
-请开始翻译："""
+        if self._glossary_lines:
+            batch_text = "\n".join(item.en_value for item in items).lower()
+            glossary_lines = [
+                line for term, line in self._glossary_lines if term in batch_text
+            ]
+            if glossary_lines:
+                glossary_text = (
+                    "\n名词表参考（请优先使用以下术语的翻译）：\n"
+                    + "".join(glossary_lines)
+                    + "\n"
+                )
 
-        return prompt
+        # 固定的说明部分只渲染一次，每个批次只拼接变化的部分
+        return "".join(
+            (
+                _prompt_header(game_context),
+                glossary_text,
+                _PROMPT_FORMAT_JSON if self.json_mode else _PROMPT_FORMAT,
+                items_text,
+                _PROMPT_FOOTER,
+            )
+        )
 
     def _parse_batch_response(
         self, response_text: str, items: List[TranslationItem]
     ) -> Dict[int, str]:
-        """解析批量翻译的响应"""
-        translations = {}
+        """
+        解析批量翻译的响应
+
+        JSON 模式下优先按 JSON 对象解析，解析失败时再按编号列表解析。
+        编号列表单次扫描：编号行开始一条新译文，之后的非编号行视为上一条译文的续行；
+        编号之前的说明文字和超出范围的编号会被忽略，缺失的编号不出现在结果中
+        """
+        if self.json_mode:
+            parsed = _parse_json_translations(response_text, len(items))
+            if parsed is not None:
+                return parsed
+
+        translations: Dict[int, str] = {}
+        current_idx: Optional[int] = None
+        buffer: List[str] = []
+
+        for line in response_text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
 
-        # 尝试按编号解析
-        lines = response_text.strip().split("\n")
-        for line in lines:
             # 匹配 "1. 中文翻译：xxx" 或 "1: xxx" 或 "1. xxx"
-            match = re.match(
-                r"^\s*(\d+)\.?\s*(?:中文翻译：|翻译：|:)?\s*(.+)$", line.strip()
-            )
+            match = _BATCH_LINE_RE.match(line)
             if match:
+                if current_idx is not None:
+                    translations[current_idx] = " ".join(buffer).strip()
                 idx = int(match.group(1)) - 1  # 转换为0-based索引
                 if 0 <= idx < len(items):
-                    translations[idx] = match.group(2).strip()
-
-        # 如果按编号解析失败，尝试按行顺序解析
-        if len(translations) != len(items):
-            translations = {}
-            for i, line in enumerate(lines):
-                if i < len(items):
-                    # 清理行
-                    line = line.strip()
-                    # 移除可能的编号前缀
-                    line = re.sub(r"^\d+[\.:]\s*", "", line)
-                    # 移除可能的"中文翻译："前缀
-                    line = re.sub(r"^中文翻译：", "", line)
-                    line = re.sub(r"^翻译：", "", line)
-                    translations[i] = line.strip()
+                    current_idx = idx
+                    buffer = [match.group(2).strip()]
+                else:
+                    current_idx = None
+            elif current_idx is not None:
+                buffer.append(line)
+
+        if current_idx is not None:
+            translations[current_idx] = " ".join(buffer).strip()
 
         return translations
 
+    def _estimate_tokens(self, item: TranslationItem) -> int:
+        """粗略估算一个翻译项在提示词中占用的 token 数"""
+        return max(8, len(item.en_value) // 2)
+
     def _get_cache_key(self, item: TranslationItem) -> str:
-        """获取缓存键"""
-        return f"{item.section}:{item.key}:{item.en_value}"
+        """
+        获取缓存键
+
+        译文只取决于英文原文，不包含 section/key，
+        这样不同词条、不同文件乃至不同 MOD 中的相同文本可以共享缓存
+        """
+        return item.en_value
 
     def translate_items(
         self,
         items: List[TranslationItem],
-        game_context: str = "《异星工厂》是一款科幻/工业自动化游戏，主题包括科技、工厂、自动化、神秘、哲学等。",
+        game_context: str = GAME_CONTEXT,
     ) -> List[str]:
         """翻译所有项目，使用批量处理和并发"""
 
         if not items:
             return []
 
+        # 相同的英文原文只翻译一次，之后再分发给所有对应的项目
+        first_items: Dict[str, TranslationItem] = {}
+        for item in items:
+            first_items.setdefault(item.en_value, item)
+        unique_items = list(first_items.values())
+
+        if len(unique_items) < len(items):
+            print(f"去重后需要翻译 {len(unique_items)} 个不同的英文文本（共 {len(items)} 个词条）")
+
+        # 先取出缓存中已有的翻译，只把未命中的项交给 AIClient 分批请求
+        translated: Dict[str, str] = {}
+        pending_items: List[TranslationItem] = []
+        for item in unique_items:
+            cached = self.client.get_cached(self._get_cache_key(item))
+            if cached is not None:
+                translated[item.en_value] = cached
+            else:
+                pending_items.append(item)
+
+        if translated:
+            print(f"缓存命中 {len(translated)} 个，需要请求 {len(pending_items)} 个")
+        if not pending_items:
+            return [translated[item.en_value] for item in items]
+
         # 使用 AIClient 处理批次
         translations = self.client.process_batches(
-            all_items=items,
-            prompt_callback=self._create_batch_prompt,
+            all_items=pending_items,
+            prompt_callback=lambda batch_items: self._create_batch_prompt(
+                batch_items, game_context
+            ),
             result_callback=lambda response_text, batch_items: self._parse_batch_response(
                 response_text, batch_items
             ),
             cache_key_callback=self._get_cache_key,
             progress_callback=lambda current, total: None,
+            weight_callback=self._estimate_tokens,
         )
 
-        # 确保所有项都有翻译
-        final_translations: List[str] = []
-        for i, translation in enumerate(translations):
-            if translation is None:
-                final_translations.append(items[i].en_value)
-            else:
-                final_translations.append(translation)
-
-        return final_translations
+        # 确保所有项都有翻译，翻译失败时保留英文原文
+        translated.update(
+            (item.en_value, translation)
+            for item, translation in zip(pending_items, translations)
+            if translation is not None
+        )
+        return [translated.get(item.en_value, item.en_value) for item in items]
 
 
 def create_batch_translator(
@@ -625,10 +1007,27 @@ def create_batch_translator(
         print("请复制 scripts/config.py.template 为 scripts/config.py")
         exit(1)
 
+    # 旧版配置文件可能没有持久化缓存配置
+    try:
+        from config import CACHE_FILE
+    except ImportError:
+        CACHE_FILE = None
+
     # 如果未提供batch_size，则使用配置文件中的值
     if batch_size is None:
         batch_size = BATCH_SIZE
 
+    # 缓存文件的相对路径相对于项目根目录
+    cache_path = None
+    if CACHE_FILE:
+        cache_path = str(script_dir.parent / CACHE_FILE)
+
+    # 旧版配置文件可能没有 JSON 模式配置，默认开启
+    try:
+        from config import JSON_MODE
+    except ImportError:
+        JSON_MODE = True
+
     # 创建 AITranslator 实例
     return AITranslator(
         api_key=API_KEY,
@@ -639,6 +1038,8 @@ def create_batch_translator(
         max_workers=max_workers,
         glossary_path=glossary_path,
         whitelist_path=whitelist_path,
+        cache_path=cache_path,
+        json_mode=JSON_MODE,
     )
 
 
@@ -649,6 +1050,8 @@ BatchTranslator = create_batch_translator
 # 导出常用类和函数
 __all__ = [
     "TranslationItem",
+    "LRUCache",
+    "SQLiteCache",
     "AIClient",
     "AITranslator",
     "BatchTranslator",
@@ -656,42 +1059,138 @@ __all__ = [
 ]
 
 
+# 模块级私有函数，计算影响译文的提示词输入的指纹
+def _prompt_fingerprint(glossary_lines: List[Tuple[str, str]], json_mode: bool) -> str:
+    """提示词模板（含游戏背景和回复格式）与名词表内容的哈希，用作持久化缓存的命名空间"""
+    digest = hashlib.sha256()
+    for part in (
+        _prompt_header(GAME_CONTEXT),
+        _PROMPT_FORMAT_JSON if json_mode else _PROMPT_FORMAT,
+        _PROMPT_FOOTER,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for _, line in glossary_lines:
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# 模块级私有函数，把整个白名单编译为一个单词边界正则
+@lru_cache(maxsize=8)
+def _whitelist_re(whitelist: FrozenSet[str]) -> Optional["re.Pattern[str]"]:
+    """
+    将白名单中的所有词合并为一个 \\b(?:词1|词2|...)\\b 正则（不区分大小写）
+    每个英文值只需扫描一次，而不是每个白名单词各扫描一次
+    """
+    words = sorted((word for word in whitelist if word), key=len, reverse=True)
+    if not words:
+        return None
+    alternation = "|".join(re.escape(word) for word in words)
+    return re.compile(r"\b(?:" + alternation + r")\b", re.IGNORECASE)
+
+
+# 模块级私有函数，调整已建立的响应连接的读超时
+def _set_read_timeout(response: requests.Response, timeout: float) -> None:
+    """
+    修改响应所在连接的套接字读超时（连接复用时 urllib3 会为下一个请求重新设置）
+    服务端要求关闭连接时拿不到套接字，此时保持请求时的读超时
+    """
+    connection = getattr(response.raw, "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        sock.settimeout(timeout)
+
+
+# 模块级私有函数，包含 needs_translation 的核心逻辑
+@lru_cache(maxsize=65536)
+def _needs_translation_cached(
+    en_value: str, zh_value: Optional[str], whitelist: FrozenSet[str]
+) -> bool:
+    """
+    判断是否需要翻译（纯函数，按参数缓存结果）
+
+    中文里相邻的变量之间常常没有空格，仍应视为已包含这些变量：
+
+    >>> _needs_translation_cached(
+    ...     "__1__ __REMARK_COLOR_BEGIN__[__2__m]__REMARK_COLOR_END__",
+    ...     "__1____REMARK_COLOR_BEGIN__（__2__米）__REMARK_COLOR_END__",
+    ...     frozenset(),
+    ... )
+    False
+    """
+    # 如果英文值是空字符串，不应该翻译
+    if not en_value or en_value.strip() == "":
+        return False
+
+    # 检查是否在白名单中（完全匹配）
+    if en_value.strip() in whitelist:
+        return False
+
+    # 检查是否包含白名单中的词（部分匹配，该词必须是独立的，前后是单词边界）
+    whitelist_re = _whitelist_re(whitelist)
+    if whitelist_re is not None and whitelist_re.search(en_value):
+        return False
+
+    # 检查英文值是否只包含变量（如__ENTITY__kr-mineral-water__）
+    # 这类值不应该被翻译，应该原样保留
+    if _contains_only_variables(en_value):
+        return False
+
+    # 检查英文值是否以中括号格式开头（如 [img=...]、[entity=...] 等）
+    # 这类值不应该被翻译，应该原样保留
+    if _starts_with_bracket_format(en_value):
+        return False
+
+    # 如果中文值不存在，需要翻译
+    if not zh_value:
+        return True
+
+    # 检查英文值中是否包含变量，并验证中文值是否也包含这些变量
+    en_variables = set(_extract_variables(en_value))
+    if en_variables:
+        # 按子串检查而不是对中文值分词：_VAR_RE 会把相邻的变量
+        # （如 __1____REMARK_COLOR_BEGIN__）合并成一个，导致误判为缺少变量
+        if any(variable not in zh_value for variable in en_variables):
+            # 中文值缺少英文值中的某个变量，需要重新翻译
+            return True
+        # 如果中文值包含了所有变量，继续检查是否是英文
+        # 如果中文值是英文，仍然需要翻译
+
+    # 如果中文值主要是英文，需要翻译
+    if _is_english_text_cached(zh_value):
+        return True
+
+    return False
+
+
 # 模块级私有函数，包含 is_english_text 的核心逻辑
-def _is_english_text_logic(text: str) -> bool:
+@lru_cache(maxsize=65536)
+def _is_english_text_cached(text: str) -> bool:
     """判断文本是否主要是英文（核心逻辑）"""
     if not text.strip():
         return False
 
+    # 快速路径：纯 ASCII 文本只要包含拉丁字母就认为是英文
+    if text.isascii():
+        return bool(_LATIN_RE.search(text))
+
     # 检查是否包含中文字符
-    if re.search(r"[\u4e00-\u9fff]", text):
+    if _CJK_RE.search(text):
         return False
 
     # 检查是否包含拉丁字母（a-zA-Z）
-    if not re.search(r"[a-zA-Z]", text):
+    if not _LATIN_RE.search(text):
         return False  # 不包含拉丁字母，不是英文
 
     # 如果文本只包含拉丁字母、数字、空格和常见标点，假设是英文
-    import string
-
-    # 计算拉丁字母和常见英文标点的数量
-    latin_and_punct = 0
-    total_chars = 0
-
-    for char in text:
-        if char in string.ascii_letters or char in string.digits:
-            latin_and_punct += 1
-        elif char in " .,!?:;-_'\"()[]{}<>/\\|=+&%$#@":
-            latin_and_punct += 1
-        elif char == "\n" or char == "\t" or char == "\r":
-            continue  # 忽略控制字符
-        else:
-            # 其他字符（可能是其他语言的字符）
-            pass
-        total_chars += 1
-
+    # 用 str.translate 在 C 层删除字符，通过长度差计算英文字符数量
+    text = text.translate(_CONTROL_DELETE_TABLE)  # 忽略控制字符
+    total_chars = len(text)
     if total_chars == 0:
         return False
 
+    latin_and_punct = total_chars - len(text.translate(_ENGLISH_DELETE_TABLE))
+
     # 如果超过70%的字符是拉丁字母或英文标点，则认为是英文
     if latin_and_punct / total_chars >= 0.7:
         return True
@@ -699,6 +1198,40 @@ def _is_english_text_logic(text: str) -> bool:
     return False
 
 
+# 模块级私有函数，解析 JSON 模式的批量翻译响应
+def _parse_json_translations(
+    response_text: str, item_count: int
+) -> Optional[Dict[int, str]]:
+    """
+    将 {"1": "译文1", "2": "译文2"} 形式的回复解析为 {0-based 索引: 译文}
+
+    回复外层可能包着代码块等多余文字，只取第一个 { 到最后一个 } 之间的内容；
+    不是合法的 JSON 对象时返回 None，由调用方回退到编号列表解析
+    """
+    start = response_text.find("{")
+    end = response_text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = _json_loads(response_text[start : end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    translations: Dict[int, str] = {}
+    for number, text in data.items():
+        if not isinstance(text, str):
+            continue
+        try:
+            idx = int(number) - 1
+        except ValueError:
+            continue
+        if 0 <= idx < item_count:
+            translations[idx] = text.strip()
+    return translations
+
+
 # 模块级私有函数，检查文本是否只包含变量
 def _contains_only_variables(text: str) -> bool:
     """检查文本是否只包含变量（如 __ENTITY__xxx__ 等）"""
@@ -706,17 +1239,8 @@ def _contains_only_variables(text: str) -> bool:
     if not text:
         return False
 
-    # 检查是否纯粹由单个变量构成
-    variable_pattern = r"^__[A-Za-z0-9_-]+__$"
-    if re.match(variable_pattern, text):
-        return True
-
-    # 检查是否只包含变量（可能多个变量组合）
-    variable_only_pattern = r"^(?:__[A-Za-z0-9_-]+__)+$"
-    if re.match(variable_only_pattern, text):
-        return True
-
-    return False
+    # 检查是否只包含变量（单个变量或多个变量组合）
+    return bool(_VAR_ONLY_RE.match(text))
 
 
 # 模块级私有函数，检查文本是否以中括号格式开头
@@ -727,18 +1251,16 @@ def _starts_with_bracket_format(text: str) -> bool:
         return False
 
     # 匹配以 [ 开头，包含 =，以 ] 结尾的格式
-    bracket_pattern = r"^\[[a-zA-Z]+=[^\]]+\]"
-    return bool(re.match(bracket_pattern, text))
+    return bool(_BRACKET_RE.match(text))
 
 
 # 模块级私有函数，提取文本中的所有变量
 def _extract_variables(text: str) -> List[str]:
     """提取文本中的所有变量（__xxx__ 格式）"""
-    variable_pattern = r"__[A-Za-z0-9_]+__"
-    return re.findall(variable_pattern, text)
+    return _VAR_RE.findall(text)
 
 
 # 导出独立函数，方便其他脚本使用
 def is_english_text(text: str) -> bool:
     """判断文本是否主要是英文（独立函数版本）"""
-    return _is_english_text_logic(text)
+    return _is_english_text_cached(text)
@@ -4,14 +4,26 @@ CFG 文件读写模块
 提供解析和更新 .cfg 文件的通用功能
 """
 
+import bisect
+import io
+import itertools
+import os
 import re
 import shutil
+import tempfile
 from pathlib import Path
 from typing import Dict, List, Tuple, Set, Optional
 
+# 节定义行 [section-name]（匹配去掉首尾空白后的行）
+_SECTION_RE = re.compile(r"^\[[^\]]+\]$")
+
+# 解析结果缓存：{绝对路径: ((st_mtime_ns, st_size), 解析结果)}，文件变化后自动失效
+_parse_cache: Dict[str, Tuple[Tuple[int, int], tuple]] = {}
+
 
 def parse_cfg_file(
     filepath: Path,
+    keep_lines: bool = True,
 ) -> Tuple[
     Dict[str, Dict[str, str]],
     Set[Tuple[str, str]],
@@ -24,62 +36,21 @@ def parse_cfg_file(
     2. 被注释掉的键集合：{(section, key)}
     3. 文件的原始行列表（用于保持格式）
     4. 键值对在文件中的行索引：{(section, key): line_number}
-    """
-    sections: Dict[str, Dict[str, str]] = {}
-    current_section = None
-    commented_keys: Set[Tuple[str, str]] = set()
-    original_lines: List[str] = []
 
-    # 存储每个键值对在文件中的行索引
-    key_line_indices: Dict[Tuple[str, str], int] = {}
-
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        # 尝试其他编码
-        with open(filepath, "r", encoding="latin-1") as f:
-            lines = f.readlines()
-
-    for line_num, line in enumerate(lines):
-        original_lines.append(line)
-        line_content = line.rstrip("\n")
-
-        # 跳过空行
-        if not line_content.strip():
-            continue
-
-        # 检查是否是节定义 [section-name]
-        section_match = re.match(r"^\s*\[([^\]]+)\]\s*$", line_content)
-        if section_match:
-            current_section = section_match.group(1)
-            sections[current_section] = {}
-            continue
-
-        # 检查是否是键值对
-        if current_section is not None:
-            # 检查是否是被注释掉的键值对（以 ## 开头）
-            if line_content.strip().startswith("##"):
-                # 移除注释符号并尝试解析
-                clean_line = line_content.strip()[2:].strip()
-                kv_match = re.match(r"^([^=]+)=(.*)$", clean_line)
-                if kv_match:
-                    key = kv_match.group(1).strip()
-                    # 记录这个键是被注释掉的
-                    commented_keys.add((current_section, key))
-                    # 存储值
-                    sections[current_section][key] = kv_match.group(2).strip()
-                    key_line_indices[(current_section, key)] = line_num
-            else:
-                # 检查是否是普通键值对
-                kv_match = re.match(r"^\s*([^=]+)=(.*)$", line_content)
-                if kv_match:
-                    key = kv_match.group(1).strip()
-                    value = kv_match.group(2).strip()
-                    sections[current_section][key] = value
-                    key_line_indices[(current_section, key)] = line_num
+    keep_lines 为 False 时第 3 项返回空列表，适用于不需要改写该文件的调用方
+    """
+    filepath = Path(filepath)
+    cache_key = str(filepath.resolve())
+    stat = filepath.stat()
+    cached = _parse_cache.get(cache_key)
+    if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+        # 一次读入整个文件再在内存中分行，换行符处理与文本模式的 readlines() 相同
+        lines = io.StringIO(_read_cfg_text(filepath), newline=None).readlines()
+        cached = ((stat.st_mtime_ns, stat.st_size), _parse_cfg_lines(lines))
+        _parse_cache[cache_key] = cached
 
-    return sections, commented_keys, original_lines, key_line_indices
+    # 返回副本，调用方（如 update_cfg_file）修改结果不会影响缓存
+    return _copy_parsed(cached[1], keep_lines)
 
 
 def get_zh_filename(en_filename: str) -> str:
@@ -98,18 +69,28 @@ def create_zh_file_from_en(en_file: Path, zh_file: Path) -> int:
     返回：添加的词条数
     """
     # 直接复制英文文件，保持完全相同的格式
-    try:
-        with open(en_file, "r", encoding="utf-8") as f:
-            en_content = f.read()
-    except UnicodeDecodeError:
-        with open(en_file, "r", encoding="latin-1") as f:
-            en_content = f.read()
+    en_text, is_utf8 = _decode_cfg_bytes(Path(en_file).read_bytes())
+    en_lines = io.StringIO(en_text, newline=None).readlines()
+
+    if is_utf8 and "\r" not in en_text:
+        # 内容无需转码或转换换行符，交给 copyfile 在内核中直接复制
+        shutil.copyfile(en_file, zh_file)
+    else:
+        with open(zh_file, "w", encoding="utf-8") as f:
+            f.writelines(en_lines)
+
+    # 统计英文文件中的词条数（直接解析已读入的内容，不再重新读取文件）
+    parsed = _parse_cfg_lines(en_lines)
+    en_sections = parsed[0]
+
+    # 两个文件内容相同，记入解析缓存，随后翻译时不必再次解析
+    for path in (en_file, zh_file):
+        stat = Path(path).stat()
+        _parse_cache[str(Path(path).resolve())] = (
+            (stat.st_mtime_ns, stat.st_size),
+            parsed,
+        )
 
-    with open(zh_file, "w", encoding="utf-8") as f:
-        f.write(en_content)
-
-    # 统计英文文件中的词条数
-    en_sections, _, _, _ = parse_cfg_file(en_file)
     total_keys = 0
     for section in en_sections:
         total_keys += len(en_sections[section])
@@ -140,6 +121,20 @@ def update_cfg_file(
 
     Returns:
         (新增条目数, 更新条目数, 保留条目数)
+
+    cfg_key_indices 会同步更新为新文件中的行号，与重新解析的结果一致；
+    文件末尾没有换行符时，补上的换行符只结束最后一行，不算作新的一行：
+
+    >>> import tempfile
+    >>> cfg = Path(tempfile.mkdtemp()) / "test.cfg"
+    >>> _ = cfg.write_text("[a]\\nx=1\\n[b]\\nz=3", encoding="utf-8")
+    >>> sections, commented, lines, indices = parse_cfg_file(cfg)
+    >>> updates = [("b", "w", "2", False), ("c", "k", "1", False)]
+    >>> updates.append(("a", "y", "2", False))
+    >>> update_cfg_file(cfg, updates, sections, commented, lines, indices, backup=False)
+    (3, 0, 0)
+    >>> indices == parse_cfg_file(cfg)[3]
+    True
     """
     # 创建备份
     if backup and cfg_file.exists():
@@ -152,109 +147,278 @@ def update_cfg_file(
     updated_count = 0
     kept_count = 0
 
-    # 用于存储需要添加的新行
-    new_lines = cfg_lines.copy()
+    # 已有键被改写的行 {行号: 新行}，写文件时替换，不复制整个行列表
+    replaced_lines: Dict[int, str] = {}
+
+    # 每个节的 [起始行, 结束行)，只扫描一次
+    section_bounds = _section_bounds(cfg_lines)
+
+    # 需要新增的键先按节收集，最后每个节一次性拼接，避免逐行 list.insert
+    # {section: {key: (value, is_commented)}}，保持首次出现的顺序
+    pending: Dict[str, Dict[str, Tuple[str, bool]]] = {}
 
     # 处理每个更新项
     for section, key, value, is_commented in updates:
-        # 检查文件中是否存在
-        if (section, key) in cfg_key_indices:
+        # 检查文件中是否存在（键元组只构造一次，一次查找同时完成判断和取值）
+        key_id = (section, key)
+        line_num = cfg_key_indices.get(key_id)
+        if line_num is not None:
             # 键已存在，更新行
-            line_num = cfg_key_indices[(section, key)]
-            is_commented_in_file = (section, key) in cfg_commented
+            is_commented_in_file = key_id in cfg_commented
 
             if is_commented_in_file:
-                new_lines[line_num] = f"##{key}={value}\n"
+                replaced_lines[line_num] = f"##{key}={value}\n"
             else:
-                new_lines[line_num] = f"{key}={value}\n"
+                replaced_lines[line_num] = f"{key}={value}\n"
 
             # 检查是新增还是更新
             # 这里简化处理：如果原值存在且不同，则认为是更新
             # 实际使用中可能需要更精确的判断
             updated_count += 1
+        elif section in cfg_sections and section not in section_bounds:
+            # 节存在于解析结果中但在文件中找不到节头，无法确定插入位置
+            continue
         else:
-            # 键不存在，需要添加
-            # 首先检查这个section是否存在
-            if section not in cfg_sections:
-                # section不存在，需要添加整个section
-                # 找到文件末尾或合适的位置插入
-                insert_pos = len(new_lines)
-
-                # 尝试在文件末尾添加，但在最后一个section之后
-                # 简单实现：添加到文件末尾
+            # 键不存在，需要添加（节不存在时会在文件末尾新建）
+            section_pending = pending.setdefault(section, {})
+            if key in section_pending:
+                # 同一个新键出现多次，保留首次的注释状态，使用最新的值
+                section_pending[key] = (value, section_pending[key][1])
+                updated_count += 1
+            else:
+                section_pending[key] = (value, is_commented)
+                added_count += 1
 
-                # 添加空行（如果最后一行不是空行）
-                if new_lines and new_lines[-1].strip() != "":
-                    new_lines.append("\n")
+    # 已有节：按插入位置排序，写文件时一次顺序遍历输出
+    # 每个节的新键作为一个整体插在节末尾（下一个节头之前），前面补一个空行分隔。
+    # 块中的行数单独记录：插在没有换行符的最后一行之后时，块开头的换行符只结束该行
+    inserts: List[Tuple[int, str, List[str], int]] = []
+    for section, entries in pending.items():
+        if section not in section_bounds:
+            continue
+        insert_pos = section_bounds[section][1]
+        block = []
+        line_total = len(entries)
+        if insert_pos > 0:
+            prev_line = replaced_lines.get(insert_pos - 1, cfg_lines[insert_pos - 1])
+            if not prev_line.endswith("\n"):
+                block.append("\n")
+            elif prev_line.strip() != "":
+                block.append("\n")
+                line_total += 1
+        for key, (value, is_commented) in entries.items():
+            block.append(f"##{key}={value}\n" if is_commented else f"{key}={value}\n")
+        inserts.append((insert_pos, section, block, line_total))
+    inserts.sort(key=lambda insert: insert[0])
+
+    # 原有键的行号整体后移其之前插入的行数（按插入位置二分查找累计偏移）
+    if inserts:
+        positions = [insert_pos for insert_pos, _, _, _ in inserts]
+        offsets = list(itertools.accumulate(total for _, _, _, total in inserts))
+        for key_id, line_num in cfg_key_indices.items():
+            i = bisect.bisect_right(positions, line_num)
+            if i:
+                cfg_key_indices[key_id] = line_num + offsets[i - 1]
+
+    # 不存在的节：依次追加到文件末尾
+    appended_sections = [
+        (section, entries)
+        for section, entries in pending.items()
+        if section not in section_bounds
+    ]
+
+    # 流式写入同目录下的临时文件，完成后原子替换，写入中断也不会留下半个文件
+    fd, tmp_path = tempfile.mkstemp(
+        dir=cfg_file.parent, prefix=cfg_file.name + ".", suffix=".tmp"
+    )
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+
+            def write_range(begin: int, end: int) -> None:
+                """输出原文件 [begin, end) 行，已改写的行输出新内容"""
+                f.writelines(
+                    replaced_lines.get(i, cfg_lines[i]) for i in range(begin, end)
+                )
+
+            line_count = 0  # 已写入的行数，用于记录新键的行号
+            last_line = ""  # 最后写入的一行，用于判断追加新节前是否需要空行
+            prev_pos = 0
+            for insert_pos, section, block, line_total in inserts:
+                write_range(prev_pos, insert_pos)
+                line_count += insert_pos - prev_pos
+                if insert_pos > prev_pos:
+                    last_line = replaced_lines.get(
+                        insert_pos - 1, cfg_lines[insert_pos - 1]
+                    )
+
+                # 新键的行号：块在新文件中的起始位置 + 块内偏移
+                f.writelines(block)
+                entries = pending[section]
+                for offset, (key, (_, is_commented)) in enumerate(
+                    entries.items(), start=line_total - len(entries)
+                ):
+                    cfg_key_indices[(section, key)] = line_count + offset
+                    if is_commented:
+                        cfg_commented.add((section, key))
+                line_count += line_total
+                last_line = block[-1]
+                prev_pos = insert_pos
+            write_range(prev_pos, len(cfg_lines))
+            line_count += len(cfg_lines) - prev_pos
+            if len(cfg_lines) > prev_pos:
+                last_line = replaced_lines.get(len(cfg_lines) - 1, cfg_lines[-1])
+
+            for section, entries in appended_sections:
+                # 添加空行（如果最后一行不是空行）；最后一行没有换行符时只补上换行符，
+                # 与原先的写法一致，此时不产生新的一行
+                if last_line and not last_line.endswith("\n"):
+                    f.write("\n")
+                elif last_line.strip() != "":
+                    f.write("\n")
+                    line_count += 1
 
                 # 添加section头
-                new_lines.append(f"[{section}]\n")
+                f.write(f"[{section}]\n")
+                line_count += 1
 
-                # 添加键值对
-                if is_commented:
-                    new_lines.append(f"##{key}={value}\n")
-                else:
-                    new_lines.append(f"{key}={value}\n")
+                # 添加键值对，并更新cfg_sections和cfg_key_indices
+                section_dict = cfg_sections.setdefault(section, {})
+                for key, (value, is_commented) in entries.items():
+                    if is_commented:
+                        last_line = f"##{key}={value}\n"
+                        cfg_commented.add((section, key))
+                    else:
+                        last_line = f"{key}={value}\n"
+                    f.write(last_line)
+                    section_dict[key] = value
+                    cfg_key_indices[(section, key)] = line_count
+                    line_count += 1
+
+        # 保留原文件的权限（mkstemp 创建的文件默认只有当前用户可读写）
+        if cfg_file.exists():
+            shutil.copymode(cfg_file, tmp_path)
+        os.replace(tmp_path, cfg_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
-                # 更新cfg_sections和cfg_key_indices
-                if section not in cfg_sections:
-                    cfg_sections[section] = {}
-                cfg_sections[section][key] = value
-                cfg_key_indices[(section, key)] = len(new_lines) - 1
+    return added_count, updated_count, kept_count
 
-                added_count += 1
+
+def _parse_cfg_lines(
+    lines: List[str],
+) -> Tuple[
+    Dict[str, Dict[str, str]],
+    Set[Tuple[str, str]],
+    List[str],
+    Dict[Tuple[str, str], int],
+]:
+    """解析已分好行的 .cfg 内容，返回值与 parse_cfg_file 相同"""
+    sections: Dict[str, Dict[str, str]] = {}
+    current_section = None
+    commented_keys: Set[Tuple[str, str]] = set()
+
+    # 存储每个键值对在文件中的行索引
+    key_line_indices: Dict[Tuple[str, str], int] = {}
+
+    # 只用 str 的内置方法解析（strip/startswith/partition），不再逐行跑正则
+    for line_num, line in enumerate(lines):
+        stripped = line.strip()
+
+        # 跳过空行
+        if not stripped:
+            continue
+
+        # 检查是否是节定义 [section-name]
+        if stripped[0] == "[" and stripped[-1] == "]":
+            section_name = stripped[1:-1]
+            if section_name and "]" not in section_name:
+                current_section = section_name
+                sections[current_section] = {}
+                continue
+
+        # 检查是否是键值对
+        if current_section is not None:
+            # 检查是否是被注释掉的键值对（以 ## 开头）
+            if stripped.startswith("##"):
+                # 移除注释符号并尝试解析
+                raw_key, sep, value = stripped[2:].lstrip().partition("=")
+                if sep and raw_key:
+                    key = raw_key.strip()
+                    # 记录这个键是被注释掉的
+                    commented_keys.add((current_section, key))
+                    # 存储值
+                    sections[current_section][key] = value.strip()
+                    key_id = (current_section, key)
+                    key_line_indices.pop(key_id, None)
+                    key_line_indices[key_id] = line_num
             else:
-                # section存在，但key不存在
-                # 找到section的结束位置（下一个section开始或文件结束）
-                section_start = -1
-                for i, line in enumerate(new_lines):
-                    if re.match(rf"^\s*\[{re.escape(section)}\]\s*$", line.strip()):
-                        section_start = i
-                        break
-
-                if section_start >= 0:
-                    # 找到section开始位置，找到section结束位置
-                    section_end = len(new_lines)
-                    for i in range(section_start + 1, len(new_lines)):
-                        if re.match(r"^\s*\[[^\]]+\]\s*$", new_lines[i].strip()):
-                            section_end = i
-                            break
-
-                    # 在section结束前插入
-                    insert_pos = section_end
-
-                    # 在插入前添加空行（如果前一行不是空行）
-                    if insert_pos > 0 and new_lines[insert_pos - 1].strip() != "":
-                        new_lines.insert(insert_pos, "\n")
-                        insert_pos += 1
-
-                    # 插入键值对
-                    if is_commented:
-                        new_lines.insert(insert_pos, f"##{key}={value}\n")
-                    else:
-                        new_lines.insert(insert_pos, f"{key}={value}\n")
+                # 检查是否是普通键值对（复用已 strip 的行，不再重复扫描空白）
+                # 行首有空白时即使 "=" 前没有其他字符也算键值对（键为空），与原行为一致
+                raw_key, sep, value = stripped.partition("=")
+                if sep and (raw_key or line[0] != "="):
+                    key = raw_key.strip()
+                    sections[current_section][key] = value.strip()
+                    # 重复键先删除再插入，保证字典的迭代顺序就是行号顺序
+                    key_id = (current_section, key)
+                    key_line_indices.pop(key_id, None)
+                    key_line_indices[key_id] = line_num
+
+    # 原始行列表直接使用传入的列表，不再逐行复制一份
+    return sections, commented_keys, lines, key_line_indices
+
+
+def _copy_parsed(parsed: tuple, keep_lines: bool = True) -> tuple:
+    """复制解析结果中的可变容器（字符串本身不可变，无需复制）"""
+    sections, commented_keys, original_lines, key_line_indices = parsed
+    return (
+        {section: dict(values) for section, values in sections.items()},
+        set(commented_keys),
+        list(original_lines) if keep_lines else [],
+        dict(key_line_indices),
+    )
+
+
+def _section_bounds(lines: List[str]) -> Dict[str, List[int]]:
+    """
+    扫描一次行列表，返回每个节的 [节头行号, 结束行号)
 
-                    # 更新cfg_key_indices（只添加新条目的索引）
-                    # 注意：这里需要确定正确的section
-                    # 由于我们是在section中插入，所以使用传入的section参数
-                    cfg_key_indices[(section, key)] = insert_pos
-                    if is_commented:
-                        cfg_commented.add((section, key))
+    结束行号是下一个节头所在行（或文件末尾）；同名节重复出现时只记录第一个
+    """
+    bounds: Dict[str, List[int]] = {}
+    current: Optional[List[int]] = None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if _SECTION_RE.match(stripped):
+            if current is not None:
+                current[1] = i
+                current = None
+            section = stripped[1:-1]
+            if section not in bounds:
+                current = bounds[section] = [i, len(lines)]
+    return bounds
+
+
+def _read_cfg_text(filepath: Path) -> str:
+    """
+    读取 .cfg 文件的全部文本
 
-                    # 更新所有后续条目的行索引（因为插入了一行，后面的行都下移了一行）
-                    for (sect, k), line_num in list(cfg_key_indices.items()):
-                        if line_num >= insert_pos and not (
-                            sect == section and k == key
-                        ):
-                            cfg_key_indices[(sect, k)] = line_num + 1
+    只读取一次字节，按 UTF-8 解码失败时再按 latin-1 解码，不必重新打开文件
+    """
+    return _decode_cfg_bytes(Path(filepath).read_bytes())[0]
 
-                    added_count += 1
 
-    # 写入文件
-    with open(cfg_file, "w", encoding="utf-8") as f:
-        f.writelines(new_lines)
+def _decode_cfg_bytes(data: bytes) -> Tuple[str, bool]:
+    """
+    解码 .cfg 文件内容，返回 (文本, 是否为 UTF-8)
 
-    return added_count, updated_count, kept_count
+    按 UTF-8 解码失败时再按 latin-1 解码
+    """
+    try:
+        return data.decode("utf-8"), True
+    except UnicodeDecodeError:
+        # 尝试其他编码
+        return data.decode("latin-1"), False
 
 
 # 导出常用函数
@@ -5,15 +5,23 @@ Factorio Mod 打包提交脚本
 """
 
 import os
+import re
 import sys
 import json
+import fnmatch
 import zipfile
 import shutil
 import platform
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Optional
 import argparse
 
+# 已经压缩过的文件格式，再做 DEFLATE 几乎不会变小，直接存储以节省打包时间
+STORED_EXTENSIONS = frozenset(
+    {".png", ".jpg", ".jpeg", ".webp", ".ogg", ".opus", ".mp3", ".zip", ".gz"}
+)
+
 
 def get_mod_info(script_dir: Path) -> tuple:
     """
@@ -79,8 +87,44 @@ def read_gitignore_patterns(source_dir: Path) -> list:
     return patterns
 
 
+def get_exclude_patterns(source_dir: Path) -> list:
+    """
+    获取打包时的排除模式：基础排除模式加上.gitignore中的模式
+
+    Args:
+        source_dir: 源目录
+
+    Returns:
+        list: 排除模式列表
+    """
+    # 从.gitignore读取排除模式
+    gitignore_patterns = read_gitignore_patterns(source_dir)
+
+    # 基础排除模式（包括.gitignore中的模式）
+    exclude_patterns = [
+        ".git",
+        "__pycache__",
+        ".DS_Store",
+        "scripts",  # 额外排除scripts目录
+    ]
+
+    # 添加.gitignore中的模式
+    for pattern in gitignore_patterns:
+        if pattern not in exclude_patterns:
+            exclude_patterns.append(pattern)
+
+    print(f"使用排除模式: {exclude_patterns}")
+    return exclude_patterns
+
+
 def create_zip_file(
-    source_dir: Path, zip_path: Path, exclude_patterns=None, mod_folder_name=None
+    source_dir: Path,
+    zip_path: Path,
+    exclude_patterns=None,
+    mod_folder_name=None,
+    compresslevel: int = 6,
+    verbose: bool = False,
+    is_excluded: Optional[Callable[[str], bool]] = None,
 ) -> bool:
     """
     创建zip文件
@@ -90,28 +134,17 @@ def create_zip_file(
         zip_path: 目标zip文件路径
         exclude_patterns: 要排除的文件模式列表
         mod_folder_name: MOD文件夹名称（用于在ZIP中创建子目录）
+        compresslevel: DEFLATE 压缩级别（0-9，越小越快、压缩率越低）
+        verbose: 是否逐个打印添加的文件
+        is_excluded: 预编译的排除匹配函数（可选），提供时忽略 exclude_patterns
 
     Returns:
         bool: 是否成功
     """
-    if exclude_patterns is None:
-        # 从.gitignore读取排除模式
-        gitignore_patterns = read_gitignore_patterns(source_dir)
-
-        # 基础排除模式（包括.gitignore中的模式）
-        exclude_patterns = [
-            ".git",
-            "__pycache__",
-            ".DS_Store",
-            "scripts",  # 额外排除scripts目录
-        ]
-
-        # 添加.gitignore中的模式
-        for pattern in gitignore_patterns:
-            if pattern not in exclude_patterns:
-                exclude_patterns.append(pattern)
-
-        print(f"使用排除模式: {exclude_patterns}")
+    if is_excluded is None:
+        if exclude_patterns is None:
+            exclude_patterns = get_exclude_patterns(source_dir)
+        is_excluded = compile_exclude_patterns(exclude_patterns)
 
     print(f"正在创建zip文件: {zip_path}")
     print(f"源目录: {source_dir}")
@@ -119,39 +152,46 @@ def create_zip_file(
     if mod_folder_name:
         print(f"MOD文件夹名称: {mod_folder_name}")
 
+    # os.walk 返回的路径都以源目录开头，直接按前缀长度切片得到相对路径，
+    # 根据异星工厂MOD要求，文件应该放在mod_folder_name目录下
+    base_len = len(os.path.join(str(source_dir), ""))
+    arc_prefix = f"{mod_folder_name}/" if mod_folder_name else ""
+
     try:
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        with zipfile.ZipFile(
+            zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+        ) as zipf:
+            file_count = 0
             # 遍历所有文件和目录
             for root, dirs, files in os.walk(source_dir):
-                # 排除不需要的目录
-                dirs[:] = [
-                    d
-                    for d in dirs
-                    if not any(
-                        pattern_match(d, pattern) for pattern in exclude_patterns
-                    )
-                ]
-
-                for file in files:
+                # 排除不需要的目录；按名称排序，保证每次打包的文件顺序一致
+                dirs[:] = sorted(d for d in dirs if not is_excluded(d))
+
+                for file in sorted(files):
                     # 检查文件是否应该被排除
-                    if any(
-                        pattern_match(file, pattern) for pattern in exclude_patterns
-                    ):
+                    if is_excluded(file):
                         continue
 
-                    file_path = Path(root) / file
+                    file_path = os.path.join(root, file)
                     # 计算在zip中的相对路径
-                    rel_path = file_path.relative_to(source_dir)
+                    arcname = arc_prefix + file_path[base_len:].replace(os.sep, "/")
 
-                    # 根据异星工厂MOD要求，文件应该放在mod_folder_name目录下
-                    if mod_folder_name:
-                        arcname = f"{mod_folder_name}/{rel_path}"
+                    # 添加到zip（已压缩的格式直接存储）
+                    if os.path.splitext(file)[1].lower() in STORED_EXTENSIONS:
+                        compress_type = zipfile.ZIP_STORED
                     else:
-                        arcname = rel_path
-
-                    # 添加到zip
-                    zipf.write(file_path, arcname)
-                    print(f"  ✓ 添加: {arcname}")
+                        compress_type = zipfile.ZIP_DEFLATED
+                    zipf.write(file_path, arcname, compress_type=compress_type)
+                    file_count += 1
+                    # 逐行打印在慢终端上代价很高，默认只定期刷新一行进度
+                    if verbose:
+                        print(f"  ✓ 添加: {arcname}")
+                    elif file_count % 500 == 0:
+                        print(f"\r  已添加 {file_count} 个文件...", end="", flush=True)
+
+            if not verbose and file_count >= 500:
+                print()
+            print(f"  共添加 {file_count} 个文件")
 
         # 获取zip文件大小
         zip_size = zip_path.stat().st_size
@@ -164,33 +204,48 @@ def create_zip_file(
         return False
 
 
-def pattern_match(name: str, pattern: str) -> bool:
+def compile_exclude_patterns(patterns: list) -> Callable[[str], bool]:
     """
-    匹配文件名或目录名是否符合模式
-    支持.gitignore风格的简单模式匹配
+    将排除模式预编译为一个匹配函数，支持.gitignore风格的简单模式：
+    - 以 / 结尾的目录模式：名称与去掉 / 后的模式完全相同
+    - 含 * 的通配符模式：按 fnmatch.fnmatch 的规则匹配（模式和名称都先做 normcase）
+    - 其他模式：名称与模式完全相同
+
+    精确名称（普通模式和目录模式）放入集合，通配符模式合并为一个正则，
+    每个文件名只需一次集合查询和一次正则匹配，而不是对每个模式各调用一次 fnmatch
 
     Args:
-        name: 文件名或目录名
-        pattern: 匹配模式
+        patterns: 排除模式列表
 
     Returns:
-        bool: 是否匹配
+        Callable[[str], bool]: 判断文件名或目录名是否应被排除的函数
+
+    >>> is_excluded = compile_exclude_patterns(["logs/", "*.backup", "README.md"])
+    >>> names = ["logs", "a.cfg.backup", "README.md", "a.cfg", "logs2", "README"]
+    >>> [name for name in names if is_excluded(name)]
+    ['logs', 'a.cfg.backup', 'README.md']
     """
-    # 处理目录模式（以/结尾）
-    if pattern.endswith("/"):
-        # 目录模式：匹配整个目录名
-        dir_pattern = pattern.rstrip("/")
-        return name == dir_pattern
+    exact_names = set()
+    wildcard_parts = []
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            exact_names.add(pattern.rstrip("/"))
+        elif "*" in pattern:
+            # 与 fnmatch.fnmatch 一致：模式和名称都先做 normcase
+            wildcard_parts.append(fnmatch.translate(os.path.normcase(pattern)))
+        else:
+            exact_names.add(pattern)
 
-    # 处理通配符模式
-    if "*" in pattern:
-        # 简单的通配符匹配
-        import fnmatch
+    wildcard_re = re.compile("|".join(wildcard_parts)) if wildcard_parts else None
 
-        return fnmatch.fnmatch(name, pattern)
+    def is_excluded(name: str) -> bool:
+        if name in exact_names:
+            return True
+        return wildcard_re is not None and bool(
+            wildcard_re.match(os.path.normcase(name))
+        )
 
-    # 处理普通模式
-    return name == pattern
+    return is_excluded
 
 
 def validate_mod_structure(source_dir: Path) -> bool:
@@ -273,6 +328,15 @@ def main():
     parser.add_argument("--output", "-o", help="输出目录路径")
     parser.add_argument("--no-validate", action="store_true", help="跳过mod结构验证")
     parser.add_argument("--list-files", action="store_true", help="列出将包含的文件")
+    parser.add_argument(
+        "--compresslevel",
+        type=int,
+        default=6,
+        choices=range(10),
+        metavar="0-9",
+        help="压缩级别，越小打包越快、文件越大（默认 6）",
+    )
+    parser.add_argument("--verbose", "-v", action="store_true", help="打包时列出每个添加的文件")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -325,47 +389,27 @@ def main():
         except Exception as e:
             print(f"警告: 无法删除旧的zip文件: {e}")
 
+    # 排除规则只读取和编译一次，列出文件和打包共用
+    is_excluded = compile_exclude_patterns(get_exclude_patterns(project_dir))
+
     # 如果要列出文件
     if args.list_files:
         print("\n将包含的文件列表:")
         print("-" * 40)
 
-        # 从.gitignore读取排除模式
-        gitignore_patterns = read_gitignore_patterns(project_dir)
-
-        # 基础排除模式
-        exclude_patterns = [
-            ".git",
-            "__pycache__",
-            ".DS_Store",
-            "scripts",  # 额外排除scripts目录
-        ]
-
-        # 添加.gitignore中的模式
-        for pattern in gitignore_patterns:
-            if pattern not in exclude_patterns:
-                exclude_patterns.append(pattern)
-
-        print(f"使用排除模式: {exclude_patterns}")
-
         file_count = 0
+        base_len = len(os.path.join(str(project_dir), ""))
 
         for root, dirs, files in os.walk(project_dir):
-            # 排除不需要的目录
-            dirs[:] = [
-                d
-                for d in dirs
-                if not any(pattern_match(d, pattern) for pattern in exclude_patterns)
-            ]
-
-            for file in files:
+            # 排除不需要的目录；与打包时的顺序保持一致
+            dirs[:] = sorted(d for d in dirs if not is_excluded(d))
+
+            for file in sorted(files):
                 # 检查文件是否应该被排除
-                if any(pattern_match(file, pattern) for pattern in exclude_patterns):
+                if is_excluded(file):
                     continue
 
-                file_path = Path(root) / file
-                rel_path = file_path.relative_to(project_dir)
-                print(f"  {rel_path}")
+                print(f"  {os.path.join(root, file)[base_len:]}")
                 file_count += 1
 
         print(f"\n总共 {file_count} 个文件")
@@ -373,7 +417,14 @@ def main():
 
     # 创建zip文件
     print("\n开始打包...")
-    success = create_zip_file(project_dir, zip_path, mod_folder_name=mod_folder_name)
+    success = create_zip_file(
+        project_dir,
+        zip_path,
+        mod_folder_name=mod_folder_name,
+        compresslevel=args.compresslevel,
+        verbose=args.verbose,
+        is_excluded=is_excluded,
+    )
 
     if not success:
         return 1
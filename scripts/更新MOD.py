@@ -12,6 +12,122 @@ import shutil
 import platform
 from pathlib import Path
 
+# 复制文件及其元数据。较新的 Python 在 Windows 上的 shutil.copy2 已经使用系统的 CopyFile2；
+# 旧版本则在用户态逐块读写，这时直接调用 CopyFileW（同样保留修改时间和文件属性）
+if platform.system() == "Windows":
+    import _winapi
+
+    _USE_COPYFILEW = not hasattr(_winapi, "CopyFile2")
+else:
+    _USE_COPYFILEW = False
+
+if _USE_COPYFILEW:
+    import ctypes
+
+    _CopyFileW = ctypes.WinDLL("kernel32", use_last_error=True).CopyFileW
+    _CopyFileW.argtypes = (ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_bool)
+    _CopyFileW.restype = ctypes.c_bool
+
+    def copy_file(src, dst) -> None:
+        """复制文件及其元数据（Windows CopyFileW）"""
+        if not _CopyFileW(str(src), str(dst), False):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+else:
+    copy_file = shutil.copy2
+
+
+# 遍历目录树统一用 os.scandir 递归（或 os.walk），不要用 Path.rglob：
+# 后者在深层目录下要慢得多，且无法复用目录项自带的类型信息
+def copy_tree(src, dst, exclude_suffixes=(".backup", ".bak", ".tmp")) -> int:
+    """
+    递归同步目录，跳过以指定后缀结尾的文件和目录
+
+    结果与先删除目标目录再完整复制相同，但只改动有变化的部分：
+    目标中大小和修改时间都与源文件相同的文件直接跳过，
+    源目录中已不存在的文件和目录会从目标中删除。
+    只遍历一次源目录（os.scandir 直接给出条目类型，无需额外 stat），
+    边复制边计数，不必复制完再遍历一遍目标目录
+
+    Args:
+        src: 源目录
+        dst: 目标目录
+        exclude_suffixes: 要排除的文件名后缀
+
+    Returns:
+        int: 同步后目标目录中的文件数量
+    """
+    os.makedirs(dst, exist_ok=True)
+
+    with os.scandir(src) as entries:
+        # 与 shutil.ignore_patterns 一致：Windows 上不区分大小写
+        source_entries = [
+            entry
+            for entry in entries
+            if not os.path.normcase(entry.name).endswith(exclude_suffixes)
+        ]
+    source_names = {entry.name for entry in source_entries}
+
+    # 先删除源目录中已不存在的条目，再复制（大小写不敏感的文件系统上也不会误删刚复制的文件）
+    existing = {}
+    with os.scandir(dst) as entries:
+        for entry in entries:
+            if entry.name not in source_names:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+            else:
+                existing[entry.name] = entry
+
+    count = 0
+    for entry in source_entries:
+        target = os.path.join(dst, entry.name)
+        old = existing.get(entry.name)
+        if entry.is_dir():
+            if old is not None and not old.is_dir(follow_symlinks=False):
+                os.remove(target)
+            count += copy_tree(entry.path, target, exclude_suffixes)
+            continue
+
+        count += 1
+        if old is not None:
+            if old.is_dir(follow_symlinks=False):
+                shutil.rmtree(target)
+            elif old.is_file(follow_symlinks=False):
+                # copy_file 会保留修改时间，两者都相同说明上次复制后没有变化
+                src_stat, dst_stat = entry.stat(), old.stat(follow_symlinks=False)
+                if (
+                    src_stat.st_size == dst_stat.st_size
+                    and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+                ):
+                    continue
+        copy_file(entry.path, target)
+    shutil.copystat(src, dst)
+    return count
+
+
+def count_files(path) -> int:
+    """
+    递归统计目录中的文件数量
+
+    os.scandir 复用目录项自带的类型信息，不必像 rglob + is_file 那样逐个 stat
+
+    Args:
+        path: 目录路径
+
+    Returns:
+        int: 文件数量
+    """
+    count = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                count += count_files(entry.path)
+            elif entry.is_file():
+                count += 1
+    return count
+
 
 def main():
     print("=" * 60)
@@ -22,15 +138,18 @@ def main():
     script_dir = Path(__file__).parent.parent.absolute()
     print(f"当前目录: {script_dir}")
 
-    # 检查必要的文件是否存在
+    # 检查必要的文件是否存在（读取一次目录列表，不再逐个 stat）
+    with os.scandir(script_dir) as entries:
+        root_entries = {entry.name: entry for entry in entries}
+
     required_files = ["info.json", "thumbnail.png"]
     for file in required_files:
-        if not (script_dir / file).exists():
+        if file not in root_entries:
             print(f"错误: 找不到 {file}")
             return 1
 
-    locale_dir = script_dir / "locale"
-    if not locale_dir.exists():
+    locale_entry = root_entries.get("locale")
+    if locale_entry is None or not locale_entry.is_dir():
         print("错误: 找不到 locale 文件夹")
         return 1
 
@@ -107,7 +226,7 @@ def main():
 
     # 1. 复制info.json
     try:
-        shutil.copy2(script_dir / "info.json", target_path / "info.json")
+        copy_file(script_dir / "info.json", target_path / "info.json")
         print(f"✓ 已复制: info.json")
     except Exception as e:
         print(f"✗ 复制info.json失败: {e}")
@@ -115,7 +234,7 @@ def main():
 
     # 2. 复制thumbnail.png
     try:
-        shutil.copy2(script_dir / "thumbnail.png", target_path / "thumbnail.png")
+        copy_file(script_dir / "thumbnail.png", target_path / "thumbnail.png")
         print(f"✓ 已复制: thumbnail.png")
     except Exception as e:
         print(f"✗ 复制thumbnail.png失败: {e}")
@@ -126,25 +245,10 @@ def main():
     target_locale = target_path / "locale"
 
     try:
-        # 如果目标locale文件夹已存在，先删除
-        if target_locale.exists():
-            shutil.rmtree(target_locale)
-
-        # 复制整个locale文件夹结构
-        shutil.copytree(
-            source_locale,
-            target_locale,
-            ignore=shutil.ignore_patterns("*.backup", "*.bak", "*.tmp"),
-        )
+        # 增量同步整个locale文件夹结构（只复制有变化的文件），同时统计文件数量
+        copied_count = copy_tree(source_locale, target_locale)
         print(f"✓ 已复制: locale文件夹（已排除.backup文件）")
-
-        # 统计复制的文件数量
-        copied_files = []
-        for root, dirs, files in os.walk(target_locale):
-            for file in files:
-                copied_files.append(os.path.join(root, file))
-
-        print(f"  共复制了 {len(copied_files)} 个文件到locale文件夹")
+        print(f"  共复制了 {copied_count} 个文件到locale文件夹")
 
     except Exception as e:
         print(f"✗ 复制locale文件夹失败: {e}")
@@ -157,13 +261,19 @@ def main():
 
     # 显示目标文件夹内容
     print("\n目标文件夹内容:")
-    for item in target_path.iterdir():
-        if item.is_file():
-            size = item.stat().st_size
-            print(f"  📄 {item.name} ({size} bytes)")
-        elif item.is_dir():
-            file_count = sum(1 for _ in item.rglob("*") if _.is_file())
-            print(f"  📁 {item.name}/ ({file_count} 个文件)")
+    # 直接使用 DirEntry 自带的类型信息，不再对每个条目单独 stat 判断类型
+    with os.scandir(target_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                size = entry.stat().st_size
+                print(f"  📄 {entry.name} ({size} bytes)")
+            elif entry.is_dir():
+                # locale 文件夹的文件数在同步时已经统计过，不再重新遍历
+                if entry.name == target_locale.name:
+                    file_count = copied_count
+                else:
+                    file_count = count_files(entry.path)
+                print(f"  📁 {entry.name}/ ({file_count} 个文件)")
 
     return 0
 
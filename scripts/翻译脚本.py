@@ -3,9 +3,13 @@
 
 from pathlib import Path
 from typing import Dict, List, Tuple, Set, Optional
+import os
 import sys
 import json
 import datetime
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 导入 AI 翻译模块
 try:
@@ -28,6 +32,28 @@ except ImportError as e:
     print("请确保 scripts/ai_translator.py 和 scripts/cfg_io.py 文件存在")
     sys.exit(1)
 
+# 日志序列化：优先使用 orjson（更快，直接输出 UTF-8 字节），未安装时回退到标准库 json
+try:
+    import orjson
+
+    def _dump_log(data: dict) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+
+    def _dump_log(data: dict) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+# 同时处理的文件数（每个文件内部还会并发发送多个批次请求）
+FILE_WORKERS = 4
+
+# 无需翻译的文件记录：英文、中文文件的修改时间和大小以及白名单都与记录相同时，
+# 说明上次检查后没有变化，translate_file 直接跳过解析
+RUN_CACHE_FILE = Path(__file__).parent.parent / "logs" / ".cache.json"
+_run_cache: Optional[Dict[str, dict]] = None
+_run_cache_lock = threading.Lock()
+
 
 def collect_translation_items(
     en_sections: Dict[str, Dict[str, str]],
@@ -53,36 +79,24 @@ def collect_translation_items(
     """
     items = []
 
-    # 使用集合来跟踪已经处理过的键，避免重复
-    processed_keys = set()
-
-    # 首先收集所有需要处理的键，按它们在英文文件中的出现顺序排序
-    all_keys = []
+    # parse_cfg_file 返回的 en_key_indices 已按行号顺序排列（键唯一），
+    # 直接按插入顺序遍历即可，无需再排序和去重
+    current_section = None
+    en_section: Dict[str, str] = {}
+    zh_section: Dict[str, str] = {}
     for (section, key), line_num in en_key_indices.items():
-        all_keys.append((line_num, section, key))
-
-    # 按行号排序
-    all_keys.sort()
-
-    # 收集需要翻译的项目
-    for line_num, section, key in all_keys:
-        # 检查是否已经处理过这个键（避免重复）
-        key_id = (section, key)
-        if key_id in processed_keys:
-            print(f"警告: 跳过重复的键: {section}.{key} (行号: {line_num})")
-            continue
-
-        processed_keys.add(key_id)
+        # 同一节的键通常是连续的，只在节切换时重新查找节字典
+        if section != current_section:
+            current_section = section
+            en_section = en_sections.get(section, {})
+            zh_section = zh_sections.get(section, {})
 
-        en_value = en_sections.get(section, {}).get(key)
+        en_value = en_section.get(key)
         if en_value is None:
             continue
 
-        is_commented_in_en = (section, key) in en_commented
-
         # 检查中文文件中是否存在
-        zh_value = zh_sections.get(section, {}).get(key)
-        is_commented_in_zh = (section, key) in zh_commented
+        zh_value = zh_section.get(key)
 
         # 判断是否需要翻译
         should_translate = translator.needs_translation(en_value, zh_value)
@@ -93,7 +107,7 @@ def collect_translation_items(
                 key=key,
                 en_value=en_value,
                 zh_value=zh_value,
-                is_commented=is_commented_in_en,
+                is_commented=(section, key) in en_commented,
                 line_num=line_num,
                 needs_translation=True,
             )
@@ -114,6 +128,7 @@ def translate_file(
     backup: bool = True,
     glossary_path: Optional[str] = None,
     whitelist_path: Optional[str] = None,
+    translator=None,
 ) -> Tuple[int, int, int]:
     """
     翻译英文词条到中文文件中
@@ -122,19 +137,31 @@ def translate_file(
         en_file: 英文文件路径
         zh_file: 中文文件路径
         backup: 是否创建备份
-        glossary_path: 名词表文件路径
-        whitelist_path: 白名单文件路径
+        glossary_path: 名词表文件路径（未提供 translator 时使用）
+        whitelist_path: 白名单文件路径（未提供 translator 时使用）
+        translator: 复用的翻译器实例（可选），未提供时为本文件单独创建
 
     Returns:
         (新增翻译数, 更新翻译数, 保留翻译数)
     """
-    # 创建批量翻译器（使用配置文件中的BATCH_SIZE、名词表和白名单）
-    translator = BatchTranslator(
-        max_workers=5, glossary_path=glossary_path, whitelist_path=whitelist_path
-    )
+    if translator is None:
+        # 创建批量翻译器（使用配置文件中的BATCH_SIZE、名词表和白名单）
+        translator = BatchTranslator(
+            max_workers=5, glossary_path=glossary_path, whitelist_path=whitelist_path
+        )
+
+    # 两个文件和白名单自上次检查后都没有变化，不必重新解析
+    # （签名在解析前获取：解析期间文件被修改时，下次运行签名不同会重新检查）
+    signature = _file_signature(en_file, zh_file, translator)
+    cached_total = _cached_total_keys(en_file, signature)
+    if cached_total is not None:
+        print(f"{en_file.name}: 文件自上次检查后没有变化，无需翻译")
+        return 0, 0, cached_total
 
     # 解析文件
-    en_sections, en_commented, en_lines, en_key_indices = parse_cfg_file(en_file)
+    en_sections, en_commented, _, en_key_indices = parse_cfg_file(
+        en_file, keep_lines=False
+    )
     zh_sections, zh_commented, zh_lines, zh_key_indices = parse_cfg_file(zh_file)
 
     # 收集需要翻译的项目
@@ -143,10 +170,11 @@ def translate_file(
     )
 
     if not items:
-        print(f"无需翻译，所有翻译都已是最新")
+        print(f"{en_file.name}: 无需翻译，所有翻译都已是最新")
+        _record_unchanged(en_file, signature, len(en_key_indices))
         return 0, 0, len(en_key_indices)
 
-    print(f"需要翻译 {len(items)} 个词条")
+    print(f"{en_file.name}: 需要翻译 {len(items)} 个词条")
 
     # 批量翻译
     translations = translator.translate_items(items)
@@ -171,8 +199,11 @@ def translate_file(
     total_keys = len(en_key_indices)
     kept_count = total_keys - added - updated
 
-    # 记录翻译日志
-    log_translation(en_file, zh_file, items, translations, added, updated, kept_count)
+    # 记录翻译日志（文件没有任何改动时不写日志）
+    if added or updated:
+        log_translation(
+            en_file, zh_file, items, translations, added, updated, kept_count
+        )
 
     return added, updated, kept_count
 
@@ -180,51 +211,51 @@ def translate_file(
 def process_single_file(
     en_file: Path,
     zh_file: Path,
-    glossary_str: Optional[str],
-    whitelist_str: Optional[str],
-    stats: Dict[str, int],
-) -> None:
+    translator,
+) -> Dict[str, int]:
     """
     处理单个文件
 
     Args:
         en_file: 英文文件路径
         zh_file: 中文文件路径
-        glossary_str: 名词表路径字符串
-        whitelist_str: 白名单路径字符串
-        stats: 统计信息字典
+        translator: 所有文件共用的翻译器实例
+
+    Returns:
+        本文件的统计信息（added/updated/kept/created），由调用方汇总
     """
+    stats = {"added": 0, "updated": 0, "kept": 0, "created": 0}
     en_filename = en_file.name
     zh_filename = get_zh_filename(en_filename)
 
-    print(f"处理: {en_filename} -> {zh_filename}")
-    print("-" * 60)
+    # 本文件的汇总信息先收集起来，处理完后一次写出，并发处理时不会与其他文件的汇总交错；
+    # translate_file 和翻译器的进度信息仍然实时输出（带文件名）
+    out = [f"处理: {en_filename} -> {zh_filename}", "-" * 60]
 
     if not zh_file.exists():
         # 中文文件不存在，从英文文件创建
-        print(f"中文文件不存在，正在创建...")
+        out.append(f"中文文件不存在，正在创建...")
         added = create_zh_file_from_en(en_file, zh_file)
         stats["created"] += 1
-        print(f"已创建文件，添加了 {added} 个词条")
-        print(f"现在开始翻译新创建的文件...")
+        out.append(f"已创建文件，添加了 {added} 个词条")
+        out.append(f"现在开始翻译新创建的文件...")
     else:
-        print(f"中文文件已存在，开始翻译...")
+        out.append(f"中文文件已存在，开始翻译...")
 
     # 翻译文件
-    added, updated, kept = translate_file(
-        en_file, zh_file, glossary_path=glossary_str, whitelist_path=whitelist_str
-    )
+    added, updated, kept = translate_file(en_file, zh_file, translator=translator)
 
     stats["added"] += added
     stats["updated"] += updated
     stats["kept"] += kept
 
     if added > 0 or updated > 0:
-        print(f"新增 {added} 个翻译，更新 {updated} 个翻译，保留 {kept} 个现有翻译")
+        out.append(f"新增 {added} 个翻译，更新 {updated} 个翻译，保留 {kept} 个现有翻译")
     else:
-        print(f"无需更新，所有翻译都已是最新")
+        out.append(f"无需更新，所有翻译都已是最新")
 
-    print()
+    sys.stdout.write("\n".join(out) + "\n\n")
+    return stats
 
 
 def main():
@@ -249,8 +280,15 @@ def main():
     # 如果中文目录不存在，创建它
     zh_dir.mkdir(exist_ok=True)
 
-    # 获取所有英文 .cfg 文件
-    en_files = list(en_dir.glob("*.cfg"))
+    # 获取所有英文 .cfg 文件（os.scandir 直接给出条目类型，无需逐个 stat）
+    with os.scandir(en_dir) as entries:
+        en_files = [
+            Path(entry.path)
+            for entry in entries
+            if entry.name.endswith(".cfg")
+            and not entry.name.startswith(".")
+            and entry.is_file()
+        ]
 
     if not en_files:
         print(f"错误: 在 {en_dir} 中没有找到 .cfg 文件")
@@ -278,11 +316,29 @@ def main():
         "created": 0,
     }
 
-    # 处理所有文件
-    for en_file in en_files:
-        zh_filename = get_zh_filename(en_file.name)
-        zh_file = zh_dir / zh_filename
-        process_single_file(en_file, zh_file, glossary_str, whitelist_str, stats)
+    # 所有文件共用一个翻译器：名词表、白名单只加载一次，HTTP 会话、线程池和缓存跨文件复用
+    # （相同的英文文本在不同文件中只翻译一次）；共享的线程池需要容纳所有文件同时发出的请求
+    translator = BatchTranslator(
+        max_workers=5 * FILE_WORKERS,
+        glossary_path=glossary_str,
+        whitelist_path=whitelist_str,
+    )
+
+    # 处理所有文件：各文件相互独立，耗时主要在等待 API 响应，
+    # 用线程池让多个文件的翻译请求同时进行；统计信息由各文件返回后在这里汇总
+    with ThreadPoolExecutor(max_workers=FILE_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                process_single_file,
+                en_file,
+                zh_dir / get_zh_filename(en_file.name),
+                translator,
+            )
+            for en_file in en_files
+        ]
+        for future in futures:
+            for name, value in future.result().items():
+                stats[name] += value
 
     # 输出汇总信息
     print("=" * 60)
@@ -347,29 +403,82 @@ def log_translation(
             "updated": updated,
             "kept": kept,
         },
-        "translations": [],
+        # 每个翻译项目的详细信息
+        "translations": [
+            {
+                "index": i,
+                "section": item.section,
+                "key": item.key,
+                "en_value": item.en_value,
+                "previous_zh_value": item.zh_value,
+                "new_zh_value": translation,
+                "is_commented": item.is_commented,
+                "line_num": item.line_num,
+            }
+            for i, (item, translation) in enumerate(zip(items, translations))
+        ],
     }
 
-    # 添加每个翻译项目的详细信息
-    for i, (item, translation) in enumerate(zip(items, translations)):
-        translation_entry = {
-            "index": i,
-            "section": item.section,
-            "key": item.key,
-            "en_value": item.en_value,
-            "previous_zh_value": item.zh_value,
-            "new_zh_value": translation,
-            "is_commented": item.is_commented,
-            "line_num": item.line_num,
-        }
-        log_data["translations"].append(translation_entry)
-
-    # 写入日志文件
-    with open(log_file, "w", encoding="utf-8") as f:
-        json.dump(log_data, f, ensure_ascii=False, indent=2)
+    # 写入日志文件（一次性序列化为字节后写入）
+    log_file.write_bytes(_dump_log(log_data))
 
     print(f"翻译日志已保存到: {log_file}")
 
 
+def _file_signature(en_file: Path, zh_file: Path, translator) -> Optional[list]:
+    """获取判断文件是否变化用的签名：两个文件的修改时间和大小，以及白名单内容的哈希"""
+    try:
+        en_stat = os.stat(en_file)
+        zh_stat = os.stat(zh_file)
+    except OSError:
+        return None
+    whitelist_hash = hashlib.sha256(
+        "\n".join(sorted(translator.whitelist)).encode("utf-8")
+    ).hexdigest()
+    return [
+        en_stat.st_mtime_ns,
+        en_stat.st_size,
+        zh_stat.st_mtime_ns,
+        zh_stat.st_size,
+        whitelist_hash,
+    ]
+
+
+def _load_run_cache() -> Dict[str, dict]:
+    """读取无需翻译的文件记录（只读取一次，调用方需持有 _run_cache_lock）"""
+    global _run_cache
+    if _run_cache is None:
+        try:
+            _run_cache = json.loads(RUN_CACHE_FILE.read_bytes())
+        except (OSError, ValueError):
+            _run_cache = {}
+    return _run_cache
+
+
+def _cached_total_keys(en_file: Path, signature: Optional[list]) -> Optional[int]:
+    """签名与记录相同时返回记录的词条总数，否则返回 None"""
+    if signature is None:
+        return None
+    with _run_cache_lock:
+        entry = _load_run_cache().get(str(en_file))
+    if entry is None or entry.get("signature") != signature:
+        return None
+    return entry.get("total_keys")
+
+
+def _record_unchanged(en_file: Path, signature: Optional[list], total_keys: int) -> None:
+    """记录该文件在此签名下无需翻译"""
+    if signature is None:
+        return
+    with _run_cache_lock:
+        cache = _load_run_cache()
+        cache[str(en_file)] = {"signature": signature, "total_keys": total_keys}
+        try:
+            RUN_CACHE_FILE.parent.mkdir(exist_ok=True)
+            RUN_CACHE_FILE.write_bytes(_dump_log(cache))
+        except OSError as e:
+            print(f"警告: 无法写入缓存文件 {RUN_CACHE_FILE}: {e}")
+
+
 if __name__ == "__main__":
     main()